@@ -1,26 +1,88 @@
 from __future__ import annotations
 
 import os
+import queue
+import threading
 import time
+import zlib
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import Optional, Dict, Any
 
 import cv2
+import numpy as np
 import streamlit as st
 from dotenv import load_dotenv
-from streamlit_webrtc import webrtc_streamer, VideoProcessorBase, WebRtcMode
+from streamlit_webrtc import webrtc_streamer, WebRtcMode
 
 import api_client as api_service
 from styles import theme
 from ui import header, overlays, sidebar
+from ui.video import VideoProcessor
 
-load_dotenv()
+# libjpeg-turbo bindings (optional) - simplejpeg -> PyTurboJPEG -> cv2.imencode 순서로 사용
+try:
+    import simplejpeg  # type: ignore
+except Exception:
+    simplejpeg = None  # type: ignore
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420  # type: ignore
+except Exception:
+    TurboJPEG = None  # type: ignore
+
+try:
+    import xxhash  # type: ignore
+except Exception:
+    xxhash = None  # type: ignore
 
 # ------------------------------------
-# Config
+# Config (.env 읽기/파싱은 프로세스당 1번; rerun마다 반복하지 않음)
 # ------------------------------------
-API_BASE_DEFAULT = os.getenv("API_BASE", "http://127.0.0.1:8000").rstrip("/")
-SCAN_INTERVAL_SEC = float(os.getenv("SCAN_INTERVAL_SEC", "1.5"))  # scan every N seconds
-AUTO_REFRESH_MS = int(os.getenv("AUTO_REFRESH_MS", "500"))        # rerun UI every N ms when camera is on
+@st.cache_resource(show_spinner=False)
+def load_config() -> SimpleNamespace:
+    load_dotenv()
+    return SimpleNamespace(
+        API_BASE_DEFAULT=os.getenv("API_BASE", "http://127.0.0.1:8000").rstrip("/"),
+        SCAN_INTERVAL_SEC=float(os.getenv("SCAN_INTERVAL_SEC", "1.5")),  # scan every N seconds
+        AUTO_REFRESH_MS=int(os.getenv("AUTO_REFRESH_MS", "500")),        # rerun UI every N ms when camera is on
+        MAX_ENCODE_WIDTH=int(os.getenv("MAX_ENCODE_WIDTH", "640")),      # downscale frame before JPEG encode
+        JPEG_QUALITY=int(os.getenv("JPEG_QUALITY", "70")),             # face crop is 112px server-side; 70 is plenty
+        FRAME_DIFF_THRESHOLD=float(os.getenv("FRAME_DIFF_THRESHOLD", "4")),  # 32x32 gray MAD; below = unchanged scene
+        DEDUPE_WINDOW_SEC=float(os.getenv("DEDUPE_WINDOW_SEC", "5")),    # same JPEG within N sec -> reuse last result
+        RECOGNIZED_COOLDOWN_SEC=float(os.getenv("RECOGNIZED_COOLDOWN_SEC", "3")),  # pause scanning after a match
+        SCAN_CAMERA_ID=os.getenv("SCAN_CAMERA_ID", "CAM_MAIN").strip() or "CAM_MAIN",
+        SCAN_EVENT_TYPE=os.getenv("SCAN_EVENT_TYPE", "CHECK_IN").strip() or "CHECK_IN",
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _get_turbojpeg():
+    # 네이티브 라이브러리 로드는 프로세스당 1번만
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except Exception:
+        return None
+
+
+_cfg = load_config()
+API_BASE_DEFAULT = _cfg.API_BASE_DEFAULT
+SCAN_INTERVAL_SEC = _cfg.SCAN_INTERVAL_SEC
+AUTO_REFRESH_MS = _cfg.AUTO_REFRESH_MS
+MAX_ENCODE_WIDTH = _cfg.MAX_ENCODE_WIDTH
+JPEG_QUALITY = _cfg.JPEG_QUALITY
+FRAME_DIFF_THRESHOLD = _cfg.FRAME_DIFF_THRESHOLD
+DEDUPE_WINDOW_SEC = _cfg.DEDUPE_WINDOW_SEC
+RECOGNIZED_COOLDOWN_SEC = _cfg.RECOGNIZED_COOLDOWN_SEC
+SCAN_CAMERA_ID = _cfg.SCAN_CAMERA_ID
+SCAN_EVENT_TYPE = _cfg.SCAN_EVENT_TYPE
+_TJ = _get_turbojpeg()
+
+# VideoProcessor는 ui/video.py(모듈 레벨)에 정의 -> rerun마다 새 class가 생기지 않음
+VideoProcessor.frame_diff_threshold = FRAME_DIFF_THRESHOLD
+VideoProcessor.max_encode_width = MAX_ENCODE_WIDTH
 
 # ------------------------------------
 # Setup
@@ -36,23 +98,13 @@ st.session_state.setdefault("last_scan_ts", 0.0)
 st.session_state.setdefault("last_scan_result", None)   # type: Optional[Dict[str, Any]]
 st.session_state.setdefault("last_scan_error", None)    # type: Optional[str]
 st.session_state.setdefault("scan_enabled", True)
+st.session_state.setdefault("last_scan_done_ts", 0.0)
 
 # UI
 header.render_header("Timekeeping Area", "Please place your face in the frame.")
 
 col_cam, col_info = st.columns([2, 1])
 
-# ------------------------------------
-# Video processor
-# ------------------------------------
-class VideoProcessor(VideoProcessorBase):
-    def __init__(self):
-        self.latest_bgr = None
-
-    def recv(self, frame):
-        self.latest_bgr = frame.to_ndarray(format="bgr24")
-        return frame
-
 # ------------------------------------
 # Camera column
 # ------------------------------------
@@ -69,21 +121,240 @@ with col_cam:
         key="timekeeping",
         mode=WebRtcMode.SENDRECV,
         video_processor_factory=VideoProcessor,
-        media_stream_constraints={"video": {"width": 1280, "height": 720}, "audio": False},
+        # 스캔은 MAX_ENCODE_WIDTH(640)로 축소해서 보내므로 카메라도 그 해상도/15fps로 요청
+        # -> recv()에서 디코딩/변환할 픽셀과 프레임 수 자체가 줄어듦
+        media_stream_constraints={
+            "video": {"width": 640, "height": 480, "frameRate": {"ideal": 15, "max": 15}},
+            "audio": False,
+        },
         async_processing=True,
     )
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 # ------------------------------------
-# Result column
+# Helper: encode frame (VideoProcessor.recv에서 이미 MAX_ENCODE_WIDTH로 축소됨)
 # ------------------------------------
-with col_info:
+def _encode_jpg(bgr, quality: int = JPEG_QUALITY) -> Optional[bytes]:
+    if bgr is None:
+        return None
+
+    # 작은 프레임용 설정: 4:2:0 subsampling + fast integer DCT, Huffman 최적화 pass 없음
+    bgr = np.ascontiguousarray(bgr)
+    if simplejpeg is not None:
+        # bytes를 바로 반환 (buf.tobytes() 복사 없음)
+        return simplejpeg.encode_jpeg(
+            bgr, quality=quality, colorspace="BGR", colorsubsampling="420", fastdct=True
+        )
+    if _TJ is not None:
+        return _TJ.encode(bgr, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), quality, int(cv2.IMWRITE_JPEG_OPTIMIZE), 0]
+    if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+        params += [int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420)]
+    ok, buf = cv2.imencode(".jpg", bgr, params)
+    if not ok:
+        return None
+    return buf.tobytes()
+
+
+def _jpg_hash(jpg: bytes) -> int:
+    # xxh3가 있으면 사용, 없으면 crc32
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(jpg)
+    return zlib.crc32(jpg)
+
+# ------------------------------------
+# HTTP session (rerun 사이에 keep-alive 커넥션 재사용)
+# ------------------------------------
+@st.cache_resource
+def _get_http_session(api_base: str):
+    return api_service.new_session(pool_size=4)
+
+# ------------------------------------
+# Scan worker (encode + HTTP off the rerun thread)
+# ------------------------------------
+class ScanWorker:
+    """
+    rerun 스레드를 막지 않도록 encode + recognize 호출을 백그라운드 스레드에서 처리.
+    VideoProcessor(= 브라우저 세션의 카메라 스트림) 하나당 하나씩 생성되므로
+    job / 결과 / cooldown이 다른 탭과 섞이지 않음. 스트림이 끝나면 stop().
+    - job: 현재 스캔 설정 (event_type, camera_id, api_base, session). None이면 대기
+    - encoder 스레드: processor.new_frame 이벤트를 기다렸다가 최신 프레임을 JPEG로 encode
+    - post 스레드: encode_q(크기 1, latest-wins)에서 꺼내 recognize 호출
+      -> 현재 요청이 진행되는 동안 다음 프레임 encode가 겹쳐서 진행됨
+    - last: 마지막 결과 (ts, result, error) 튜플.
+      튜플을 통째로 교체하는 단일 대입이라 읽는 쪽은 lock/복사 없이 참조만 가져감
+    - 인식 성공 후 RECOGNIZED_COOLDOWN_SEC 동안은 프레임을 보내지 않음 (패널은 마지막 결과 유지)
+    """
+
+    def __init__(self, proc: "VideoProcessor"):
+        self.proc = proc
+        self.last: Optional[tuple] = None
+        self._job: Optional[tuple] = None
+        self._hold_until = 0.0  # 이 시각까지 스캔 중지 (인식 성공 직후)
+        self._lock = threading.Lock()  # job / hold 갱신용
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._encode_q: "queue.Queue" = queue.Queue(maxsize=1)
+        self.threads = (
+            threading.Thread(target=self._encode_loop, name="scan-encoder", daemon=True),
+            threading.Thread(target=self._post_loop, name="scan-post", daemon=True),
+        )
+        for t in self.threads:
+            t.start()
+
+    def set_job(self, value: Optional[tuple]) -> None:
+        with self._lock:
+            self._job = value
+        if value is not None:
+            self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        _put_latest(self._encode_q, None)
+
+    def _publish(self, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        self.last = (time.time(), result, error)
+
+    def _encode_loop(self) -> None:
+        proc = self.proc
+        last = 0.0
+        while not self._stopped.is_set():
+            with self._lock:
+                cur = self._job
+                hold_remain = self._hold_until - time.time()
+            if cur is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            # 인식 성공 직후 cooldown: 서버 임베딩 호출 생략 (job 변경은 주기적으로 다시 확인)
+            if hold_remain > 0:
+                time.sleep(min(hold_remain, SCAN_INTERVAL_SEC))
+                continue
+
+            # 최소 스캔 간격 유지
+            remain = SCAN_INTERVAL_SEC - (time.time() - last)
+            if remain > 0:
+                time.sleep(remain)
+
+            # 새 프레임이 들어올 때까지 대기 (timeout이면 job을 다시 확인)
+            if not proc.new_frame.wait(SCAN_INTERVAL_SEC):
+                continue
+            proc.new_frame.clear()
+            frame = proc.latest_bgr
+            last = time.time()
+
+            jpg = _encode_jpg(frame)
+            if jpg is None:
+                self._publish(None, "Camera frame is not ready yet.")
+                continue
+            _put_latest(self._encode_q, (jpg,) + cur)
+
+    def _post_loop(self) -> None:
+        # 최근 전송한 JPEG 해시 -> (ts, result). 8칸 LRU, DEDUPE_WINDOW_SEC 지나면 만료
+        sent: "OrderedDict[int, tuple]" = OrderedDict()
+
+        while True:
+            item = self._encode_q.get()
+            if item is None or self._stopped.is_set():
+                return
+            jpg, event_type, camera_id, base, http = item
+
+            h = _jpg_hash(jpg)
+            hit = sent.get(h)
+            if hit is not None and (time.time() - hit[0]) < DEDUPE_WINDOW_SEC:
+                # 최근에 보낸 것과 같은 JPEG (A->B->A 왕복 포함) -> HTTP 생략하고 그때 결과 재사용
+                sent.move_to_end(h)
+                self._publish(hit[1], None)
+                continue
+
+            try:
+                result = api_service.recognize(jpg, event_type, camera_id, base, session=http)
+            except Exception as e:
+                self._publish(None, f"Recognize call failed: {type(e).__name__}: {e}")
+                continue
+
+            sent[h] = (time.time(), result)
+            sent.move_to_end(h)
+            while len(sent) > 8:
+                sent.popitem(last=False)
+            if isinstance(result, dict) and result.get("recognized"):
+                with self._lock:
+                    self._hold_until = time.time() + RECOGNIZED_COOLDOWN_SEC
+            self._publish(result, None)
+
+
+def _put_latest(q: "queue.Queue", item: Any) -> None:
+    # 밀린 항목은 버리고 최신 항목만 넣음
+    try:
+        q.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        pass
+
+
+# ------------------------------------
+# Scan step
+# ------------------------------------
+def _should_scan() -> bool:
+    if not st.session_state.scan_enabled:
+        return False
+    if not getattr(ctx.state, "playing", False):
+        return False
+    if not ctx.video_processor:
+        return False
+    return True
+
+
+def _scan_worker() -> Optional[ScanWorker]:
+    # 이 세션의 카메라 스트림에 붙은 worker (없으면 생성). 스트림이 없으면 None
+    proc = ctx.video_processor
+    if not proc:
+        return None
+    if proc.scan is None:
+        proc.scan = ScanWorker(proc)
+    return proc.scan
+
+
+def _apply_scan_result() -> None:
+    # 이 세션 worker가 끝낸 결과를 세션 상태로 반영 (불변 튜플 참조라 lock 불필요)
+    worker = _scan_worker()
+    done = worker.last if worker is not None else None
+    if done is None:
+        return
+
+    ts, result, error = done
+    if ts > float(st.session_state.last_scan_done_ts):
+        st.session_state.last_scan_done_ts = ts
+        st.session_state.last_scan_ts = ts  # UI 표시용
+        if error:
+            st.session_state.last_scan_error = error
+        else:
+            st.session_state.last_scan_result = result
+            st.session_state.last_scan_error = None
+
+
+# ------------------------------------
+# Result column (fragment: camera가 켜져 있으면 이 부분만 주기적으로 rerun)
+# ------------------------------------
+_playing = bool(getattr(ctx.state, "playing", False))
+
+
+@st.fragment(run_every=(AUTO_REFRESH_MS / 1000.0) if _playing else None)
+def _scan_panel() -> None:
     st.caption(f"API Base: `{api_base}`")
 
     scan_enabled = st.toggle("Enable scanning", value=st.session_state.scan_enabled)
     st.session_state.scan_enabled = scan_enabled
 
+    _apply_scan_result()
+
     res = st.session_state.get("last_scan_result")
     err = st.session_state.get("last_scan_error")
 
@@ -108,66 +379,14 @@ with col_info:
             }
         )
 
-# ------------------------------------
-# Helper: encode frame smaller (reduce latency)
-# ------------------------------------
-def _encode_jpg(bgr, max_w: int = 640, quality: int = 85) -> Optional[bytes]:
-    if bgr is None:
-        return None
-
-    h, w = bgr.shape[:2]
-    if w > max_w:
-        scale = max_w / float(w)
-        bgr = cv2.resize(bgr, (int(w * scale), int(h * scale)))
-
-    ok, buf = cv2.imencode(".jpg", bgr, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
-    if not ok:
-        return None
-    return buf.tobytes()
-
-# ------------------------------------
-# Auto refresh (so scanning continues even if API fails)
-# ------------------------------------
-def _autorefresh_when_playing():
-    if getattr(ctx.state, "playing", False):
-        # Streamlit의 experimental rerun 루프를 안정화하기 위한 트릭:
-        # 특정 시간 간격마다 query param을 바꿔 rerun 유도
-        st.query_params["_t"] = str(int(time.time() * 1000) // AUTO_REFRESH_MS)
-
-_autorefresh_when_playing()
-
-# ------------------------------------
-# Scan step
-# ------------------------------------
-def _should_scan() -> bool:
-    if not st.session_state.scan_enabled:
-        return False
-    if not getattr(ctx.state, "playing", False):
-        return False
-    if not ctx.video_processor:
-        return False
-    last = float(st.session_state.get("last_scan_ts") or 0.0)
-    return (time.time() - last) >= SCAN_INTERVAL_SEC
-
-if _should_scan():
-    frame = ctx.video_processor.latest_bgr if ctx.video_processor else None
-    jpg = _encode_jpg(frame)
-
-    if jpg is None:
-        st.session_state.last_scan_error = "Camera frame is not ready yet."
-        st.session_state.last_scan_ts = time.time()
-        st.rerun()
-    else:
-        try:
-            # Default is CHECK_IN, Camera Default
-            resp = api_service.recognize(jpg, "CHECK_IN", "CAM_MAIN", api_base)
+    worker = _scan_worker()
+    if worker is not None:
+        if _should_scan():
+            # Default is CHECK_IN, Camera Default (SCAN_EVENT_TYPE / SCAN_CAMERA_ID)
+            worker.set_job((SCAN_EVENT_TYPE, SCAN_CAMERA_ID, api_base, _get_http_session(api_base)))
+        else:
+            worker.set_job(None)
 
-            st.session_state.last_scan_result = resp
-            st.session_state.last_scan_error = None
-            st.session_state.last_scan_ts = time.time()
-            st.rerun()
 
-        except Exception as e:
-            st.session_state.last_scan_error = f"Recognize call failed: {type(e).__name__}: {e}"
-            st.session_state.last_scan_ts = time.time()
-            st.rerun()
+with col_info:
+    _scan_panel()
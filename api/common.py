@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, List, Optional, Callable
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 
 def execute_or_500(fn: Callable[[], Any], msg: str) -> Any:
@@ -18,6 +19,14 @@ def execute_or_500(fn: Callable[[], Any], msg: str) -> Any:
         raise HTTPException(status_code=500, detail=f"{msg}: {e}")
 
 
+async def execute_or_500_async(fn: Callable[[], Any], msg: str) -> Any:
+    """
+    async 라우트용 execute_or_500.
+    supabase-py 호출은 동기 HTTP라서 워커 스레드에서 돌려 이벤트 루프를 막지 않는다.
+    """
+    return await run_in_threadpool(execute_or_500, fn, msg)
+
+
 def get_data(resp: Any) -> List[Dict[str, Any]]:
     data = getattr(resp, "data", None)
     if data is None:
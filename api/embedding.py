@@ -1,21 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
-from typing import Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 import cv2
 
+try:
+    import simplejpeg  # libjpeg-turbo (SIMD IDCT); cv2.imdecode fallback
+except Exception:
+    simplejpeg = None
+
 # -----------------------------------------------------------------------------
 # Optional model imports (graceful fallback when models/ is missing)
 # -----------------------------------------------------------------------------
 _MODEL_AVAILABLE = True
 try:
-    from api.models.face_models import load_retinaface, load_arcface  # type: ignore
+    from api.models.face_models import load_retinaface, load_arcface, default_device  # type: ignore
 except Exception:
     _MODEL_AVAILABLE = False
     load_retinaface = None  # type: ignore
     load_arcface = None  # type: ignore
+    default_device = None  # type: ignore
 
 # If models are missing, enable dummy mode by default (can be overridden)
 # - DUMMY_MODE=1 : always dummy (even if models exist)
@@ -27,6 +38,27 @@ if _env_dummy == "":
 else:
     DUMMY_MODE = _env_dummy == "1"
 
+# Inference device: FACE_DEVICE env, else cuda if onnxruntime-gpu is installed
+DEVICE = default_device() if _MODEL_AVAILABLE else "cpu"  # type: ignore
+
+
+# Detection runs on a copy downscaled to this longest side (crop still uses full res)
+DETECT_MAX_SIDE = int(os.getenv("DETECT_MAX_SIDE", "640"))
+
+# Large JPEGs are decoded at 1/2, 1/4, ... scale (inside libjpeg-turbo's IDCT)
+# as long as both sides stay >= this; 0 = always full resolution
+DECODE_MIN_SIDE = int(os.getenv("DECODE_MIN_SIDE", "1280"))
+
+# Decode + detect for the images of one batch run on this pool
+# (cv2 and onnxruntime release the GIL, so these overlap for real)
+EMBED_PREP_WORKERS = int(os.getenv("EMBED_PREP_WORKERS", "4"))
+_PREP_POOL: Optional[ThreadPoolExecutor] = None
+
+# Same upload bytes (client retries, re-enrolling the same photo) -> cached embedding
+# instead of decode + detect + ArcFace again. 0 disables.
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "256"))
+_EMB_CACHE: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_EMB_CACHE_LOCK = threading.Lock()
 
 # Lazy-loaded models
 _RETINA = None
@@ -49,12 +81,37 @@ def _ensure_models() -> None:
         )
 
     if _RETINA is None:
-        _RETINA = load_retinaface()  # type: ignore
+        _RETINA = load_retinaface(DEVICE)  # type: ignore
     if _ARCFACE is None:
-        _ARCFACE = load_arcface()  # type: ignore
+        _ARCFACE = load_arcface(DEVICE)  # type: ignore
+
+
+def preload_models() -> None:
+    """
+    Load (and warm up) models at startup instead of on the first request.
+    Failures are logged and left to the lazy path, as before.
+    """
+    try:
+        _ensure_models()
+    except Exception as e:
+        print(f"⚠️ model preload failed: {e}")
 
 
 def _decode_image(image_bytes: bytes) -> np.ndarray:
+    # EXIF가 있는 사진(폰 셀카 등)은 cv2.imdecode가 orientation 회전까지 해주므로 그쪽으로.
+    # 웹캠 프레임(클라이언트 encode)은 EXIF가 없어서 libjpeg-turbo 경로를 탐
+    if (
+        simplejpeg is not None
+        and image_bytes[:2] == b"\xff\xd8"
+        and b"Exif\x00\x00" not in image_bytes[:65536]
+    ):
+        try:
+            return simplejpeg.decode_jpeg(
+                image_bytes, colorspace="BGR", min_height=DECODE_MIN_SIDE, min_width=DECODE_MIN_SIDE
+            )
+        except Exception:
+            pass  # corrupt/unsupported JPEG -> let cv2 try
+
     arr = np.frombuffer(image_bytes, dtype=np.uint8)
     img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
     if img is None:
@@ -80,14 +137,23 @@ def _crop_face(img_bgr: np.ndarray) -> np.ndarray:
             raise ValueError("Invalid dummy crop.")
         return face
 
-    bboxes, landmarks = _RETINA.detect(img_bgr)  # type: ignore
+    # 큰 업로드(셀카 등)는 축소본에서 검출 -> detector 연산량은 픽셀 수에 비례
+    h, w = img_bgr.shape[:2]
+    scale = min(1.0, DETECT_MAX_SIDE / float(max(h, w)))
+    if scale < 1.0:
+        det_img = cv2.resize(img_bgr, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    else:
+        det_img = img_bgr
+
+    bboxes, landmarks = _RETINA.detect(det_img)  # type: ignore
     if bboxes is None or len(bboxes) == 0:
         raise ValueError("No face detected.")
 
-    best = max(bboxes, key=lambda x: float(x[4]) if len(x) > 4 else 0.0)
-    x1, y1, x2, y2 = [int(v) for v in best[:4]]
+    # (N,4|5) -> 점수 열 argmax + 좌표 복원을 배열 연산 한 번으로 (anchor별 Python loop 없음)
+    boxes = np.asarray(bboxes, dtype=np.float32).reshape(len(bboxes), -1)
+    best = boxes[int(np.argmax(boxes[:, 4]))] if boxes.shape[1] > 4 else boxes[0]
+    x1, y1, x2, y2 = (best[:4] / scale).astype(np.int32).tolist()
 
-    h, w = img_bgr.shape[:2]
     x1 = max(0, min(w - 1, x1))
     x2 = max(0, min(w - 1, x2))
     y1 = max(0, min(h - 1, y1))
@@ -100,14 +166,38 @@ def _crop_face(img_bgr: np.ndarray) -> np.ndarray:
     return face
 
 
-def _preprocess_for_arcface(face_bgr: np.ndarray) -> np.ndarray:
+def _preprocess_for_arcface(faces: List[np.ndarray]) -> np.ndarray:
     """
     ArcFace commonly expects 112x112 RGB, normalized.
+    One cv2.dnn.blobFromImages call does resize + BGR->RGB + /255 + HWC->NCHW
+    for all crops, straight into a (B,3,112,112) float32 blob.
     """
-    face = cv2.resize(face_bgr, (112, 112))
-    face_rgb = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
-    face_rgb = face_rgb.astype(np.float32) / 255.0
-    return face_rgb
+    return cv2.dnn.blobFromImages(
+        faces, scalefactor=1.0 / 255.0, size=(112, 112), mean=(0, 0, 0), swapRB=True, crop=False
+    )
+
+
+def _image_key(image_bytes: bytes) -> bytes:
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def _cache_get(key: bytes) -> Optional[np.ndarray]:
+    with _EMB_CACHE_LOCK:
+        emb = _EMB_CACHE.get(key)
+        if emb is not None:
+            _EMB_CACHE.move_to_end(key)
+        return emb
+
+
+def _cache_put(key: bytes, emb: np.ndarray) -> None:
+    if EMBED_CACHE_SIZE <= 0:
+        return
+    emb.setflags(write=False)  # shared between callers -> read-only
+    with _EMB_CACHE_LOCK:
+        _EMB_CACHE[key] = emb
+        _EMB_CACHE.move_to_end(key)
+        while len(_EMB_CACHE) > EMBED_CACHE_SIZE:
+            _EMB_CACHE.popitem(last=False)
 
 
 def _dummy_embedding(seed: int = 42, dim: int = 512) -> np.ndarray:
@@ -118,25 +208,235 @@ def _dummy_embedding(seed: int = 42, dim: int = 512) -> np.ndarray:
     return rng.random(dim, dtype=np.float32)
 
 
+def _arcface_forward(batch: np.ndarray) -> np.ndarray:
+    """
+    (B,3,112,112) float32 -> (B,D) embeddings.
+    - wrapper with get_embedding(): one call per face (HWC)
+    - onnxruntime InferenceSession: one run() for the whole batch
+      (falls back to per-face runs when the model has a fixed batch of 1)
+    """
+    if hasattr(_ARCFACE, "get_embedding"):
+        embs = []
+        for x in batch:
+            emb = _ARCFACE.get_embedding(x.transpose(1, 2, 0))  # type: ignore
+            if emb is None:
+                raise ValueError("Failed to get embedding.")
+            embs.append(np.asarray(emb, dtype=np.float32).reshape(-1))
+        return np.stack(embs)
+
+    inp = _ARCFACE.get_inputs()[0]  # type: ignore
+    x = batch
+    if len(inp.shape) == 4 and inp.shape[1] != 3 and inp.shape[3] == 3:  # NHWC model
+        x = np.ascontiguousarray(batch.transpose(0, 2, 3, 1))
+
+    if inp.shape and inp.shape[0] == 1 and len(batch) > 1:
+        outs = [_ARCFACE.run(None, {inp.name: x[i:i + 1]})[0] for i in range(len(batch))]  # type: ignore
+        out = np.concatenate(outs, axis=0)
+    else:
+        out = _ARCFACE.run(None, {inp.name: x})[0]  # type: ignore
+    return np.asarray(out, dtype=np.float32).reshape(len(batch), -1)
+
+
+def _l2_normalize(embs: np.ndarray) -> np.ndarray:
+    """
+    Row-wise L2 normalize (B,D) in place; zero rows are left as-is.
+    einsum gives the squared norms without the (B,D) x*x temporary that
+    np.linalg.norm allocates; then one in-place multiply by 1/norm.
+    """
+    sq = np.einsum("ij,ij->i", embs, embs)
+    inv = np.zeros_like(sq)
+    np.sqrt(sq, out=inv, where=sq > 0)
+    np.divide(1.0, inv, out=inv, where=sq > 0)
+    embs *= inv[:, None]
+    return embs
+
+
+def _prepare_faces(images: List[bytes]) -> List[Union[np.ndarray, Exception]]:
+    """
+    Decode/detect/crop per image (in parallel on _PREP_POOL).
+    Per-image failures are returned in place (as the exception).
+    """
+    global _PREP_POOL
+    _ensure_models()
+
+    def _prepare(image_bytes: bytes) -> Union[np.ndarray, Exception]:
+        try:
+            img = _decode_image(image_bytes)
+            return _crop_face(img)
+        except Exception as e:
+            return e
+
+    if len(images) > 1 and EMBED_PREP_WORKERS > 1:
+        if _PREP_POOL is None:
+            _PREP_POOL = ThreadPoolExecutor(max_workers=EMBED_PREP_WORKERS, thread_name_prefix="embed-prep")
+        return list(_PREP_POOL.map(_prepare, images))
+    return [_prepare(b) for b in images]
+
+
+def _embed_faces(prepared: List[Union[np.ndarray, Exception]]) -> List[Union[np.ndarray, Exception]]:
+    """ArcFace once for all valid crops from _prepare_faces; exceptions pass through."""
+    results: List[Union[np.ndarray, Exception]] = []
+    faces: List[np.ndarray] = []
+    face_idx: List[int] = []
+
+    for i, res in enumerate(prepared):
+        if isinstance(res, Exception):
+            results.append(res)
+            continue
+        faces.append(res)
+        face_idx.append(i)
+        results.append(ValueError("Failed to get embedding."))  # placeholder
+
+    if faces:
+        # resize/scale/NCHW for all crops in one C++ pass (no per-face float arrays + np.stack copy)
+        batch = _preprocess_for_arcface(faces)
+        # unit-norm output: stored enrollments and queries compare by plain inner product
+        embs = _l2_normalize(_arcface_forward(batch))
+        for i, emb in zip(face_idx, embs):
+            results[i] = emb
+    return results
+
+
+def get_embeddings_from_image_bytes(images: List[bytes]) -> List[Union[np.ndarray, Exception]]:
+    """
+    Batched version of get_embedding_from_image_bytes.
+    Decode/detect/crop run per image (in parallel on _PREP_POOL); ArcFace runs once for all valid faces.
+    Per-image failures are returned in place (as the exception) instead of raised.
+    Images seen recently (same bytes) come from the embedding cache (read-only arrays).
+    """
+    if DUMMY_MODE:
+        return [_dummy_embedding(seed=42, dim=512) for _ in images]
+    if EMBED_CACHE_SIZE <= 0:
+        return _embed_faces(_prepare_faces(images))
+
+    keys = [_image_key(b) for b in images]
+    results: List[Union[np.ndarray, Exception, None]] = [_cache_get(k) for k in keys]
+    miss = [i for i, r in enumerate(results) if r is None]
+    if miss:
+        computed = _embed_faces(_prepare_faces([images[i] for i in miss]))
+        for i, res in zip(miss, computed):
+            if not isinstance(res, Exception):
+                _cache_put(keys[i], res)
+            results[i] = res
+    return results  # type: ignore[return-value]
+
+
 def get_embedding_from_image_bytes(image_bytes: bytes) -> np.ndarray:
     """
-    Decode image -> detect+crop face -> ArcFace embedding
+    Decode image -> detect+crop face -> ArcFace embedding (L2-normalized)
     If models are missing (dummy mode), returns a deterministic 512-dim vector.
     """
     if DUMMY_MODE:
         # You can change seed based on image content for variation if you want.
         return _dummy_embedding(seed=42, dim=512)
 
-    _ensure_models()
-    img = _decode_image(image_bytes)
-    face = _crop_face(img)
-    x = _preprocess_for_arcface(face)
-
-    emb = _ARCFACE.get_embedding(x)  # type: ignore
-    if emb is None:
-        raise ValueError("Failed to get embedding.")
-    emb = np.asarray(emb, dtype=np.float32).reshape(-1)
-    return emb
+    res = get_embeddings_from_image_bytes([image_bytes])[0]
+    if isinstance(res, Exception):
+        raise res
+    return res
+
+
+# -----------------------------------------------------------------------------
+# Micro-batching for concurrent requests
+# -----------------------------------------------------------------------------
+# Concurrent callers of get_embedding_async() are coalesced into one
+# get_embeddings_from_image_bytes() call (up to EMBED_BATCH_MAX images, or
+# whatever arrived within EMBED_BATCH_WAIT_MS of the first one).
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "8"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "20"))
+
+# Batches are pipelined: detection for batch N+1 runs on _PREP_POOL while
+# ArcFace for batch N runs on its own single thread (_ARC_POOL), so the two
+# models overlap instead of alternating. At most EMBED_PIPELINE_DEPTH
+# batches are in flight.
+EMBED_PIPELINE_DEPTH = int(os.getenv("EMBED_PIPELINE_DEPTH", "2"))
+
+_BATCH_QUEUE: Optional[asyncio.Queue] = None
+_BATCH_TASK: Optional[asyncio.Task] = None
+_ARC_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def start_batcher() -> None:
+    """Start the batching task on the running event loop (FastAPI startup)."""
+    global _BATCH_QUEUE, _BATCH_TASK
+    if _BATCH_TASK is not None and not _BATCH_TASK.done():
+        return
+    _BATCH_QUEUE = asyncio.Queue()
+    _BATCH_TASK = asyncio.get_running_loop().create_task(_batcher(_BATCH_QUEUE))
+
+
+async def _batcher(queue: asyncio.Queue) -> None:
+    global _ARC_POOL
+    if _ARC_POOL is None:
+        _ARC_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-arcface")
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max(1, EMBED_PIPELINE_DEPTH))
+    inflight: set = set()
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + EMBED_BATCH_WAIT_MS / 1000.0
+        while len(items) < EMBED_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        await slots.acquire()
+        task = loop.create_task(_run_batch(items))
+        inflight.add(task)  # event loop는 task를 약한 참조로만 들고 있음
+
+        def _done(t: asyncio.Task) -> None:
+            inflight.discard(t)
+            slots.release()
+
+        task.add_done_callback(_done)
+
+
+async def _run_batch(items: list) -> None:
+    loop = asyncio.get_running_loop()
+    images = [b for b, _, _ in items]
+    try:
+        if DUMMY_MODE:
+            results = get_embeddings_from_image_bytes(images)
+        else:
+            prepared = await asyncio.to_thread(_prepare_faces, images)
+            results = await loop.run_in_executor(_ARC_POOL, _embed_faces, prepared)
+    except Exception as e:
+        results = [e] * len(items)
+
+    for (_, key, fut), res in zip(items, results):
+        if isinstance(res, Exception):
+            if not fut.done():
+                fut.set_exception(res)
+            continue
+        if key is not None:
+            _cache_put(key, res)
+        if not fut.done():
+            fut.set_result(res)
+
+
+async def get_embedding_async(image_bytes: bytes) -> np.ndarray:
+    """
+    Async get_embedding_from_image_bytes that joins the current micro-batch.
+    Without a running batcher (scripts, tests) it just runs in a worker thread.
+    """
+    if _BATCH_QUEUE is None or _BATCH_TASK is None or _BATCH_TASK.done():
+        return await asyncio.to_thread(get_embedding_from_image_bytes, image_bytes)
+
+    key = None
+    if not DUMMY_MODE and EMBED_CACHE_SIZE > 0:
+        key = _image_key(image_bytes)
+        emb = _cache_get(key)
+        if emb is not None:
+            return emb
+
+    fut = asyncio.get_running_loop().create_future()
+    await _BATCH_QUEUE.put((image_bytes, key, fut))
+    return await fut
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
@@ -11,14 +11,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except Exception:
+    DefaultResponse = JSONResponse
+
 import traceback
 
+from api.embedding import preload_models, start_batcher
 from api.model_assets import ensure_models
 from api.routes import employees, faces, logs, cameras, recognize, schedules
 
 load_dotenv()
 
-app = FastAPI(title="Face Attendance API")
+# list_logs/list_employees 처럼 큰 리스트 응답은 orjson으로 인코딩 (없으면 기본 json)
+app = FastAPI(title="Face Attendance API", default_response_class=DefaultResponse)
 
 # ---- CORS
 app.add_middleware(
@@ -80,6 +88,14 @@ def __version() -> Dict[str, Any]:
 def _startup():
     # 모델 파일 확보 (다운로드/캐시)
     ensure_models()
+    # 세션 로드 + warm-up (첫 요청 지연 방지)
+    preload_models()
+
+
+@app.on_event("startup")
+async def _start_embedding_batcher():
+    # 동시 enroll 요청을 모아서 한 번에 임베딩 (api/embedding.py)
+    start_batcher()
 
 @app.exception_handler(Exception)
 async def all_exception_handler(request: Request, exc: Exception):
@@ -1,8 +1,11 @@
 # api/model_assets.py
 from __future__ import annotations
 
+import hashlib
 import os
+import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tempfile
 
@@ -30,15 +33,90 @@ def _get_models_dir():
     return Path(os.getenv("MODELS_DIR", str(default_dir))).resolve()
 
 
-def _download(url: str, out_path: Path) -> None:
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _content_range(value: str) -> tuple:
+    """'bytes 100-199/200' -> (100, 200), 'bytes */200' -> (None, 200). 못 읽으면 (None, None)."""
+    try:
+        unit, spec = (value or "").strip().split(" ", 1)
+        rng, total = spec.split("/", 1)
+        start = None if rng == "*" else int(rng.split("-", 1)[0])
+        return start, (None if total == "*" else int(total))
+    except Exception:
+        return None, None
+
+
+def _fetch(url: str, tmp: Path) -> None:
+    """
+    url -> tmp. 이전 부팅에서 받다 만 tmp가 있으면 Range로 이어받음.
+    - 416: tmp가 이미 전체 크기면 완료로 간주, 아니면 지우고 처음부터
+    - 206: Content-Range 시작 위치가 tmp 크기와 같을 때만 이어 붙임
+    - 그 외(200, 엉뚱한 206): 처음부터 다시 받음
+    - tmp가 다른 url이거나 검증자(ETag/Last-Modified)가 없으면 이어받지 않음
+    """
+    # tmp를 받을 때의 url + ETag/Last-Modified. 다르면(다른 asset/버전) 이어받지 않음
+    meta = tmp.with_suffix(tmp.suffix + ".meta")
+    src, validator = (meta.read_text().split("\n", 1) + [""])[:2] if meta.exists() else ("", "")
+    if tmp.exists() and (src != url or not validator):
+        tmp.unlink()
+
+    done = tmp.stat().st_size if tmp.exists() else 0
+    req = urllib.request.Request(url)
+    if done:
+        req.add_header("Range", f"bytes={done}-")
+        req.add_header("If-Range", validator)  # 서버 쪽 파일이 바뀌었으면 200(전체)으로 응답
+
+    try:
+        r = urllib.request.urlopen(req)
+    except urllib.error.HTTPError as e:
+        if e.code != 416 or not done:
+            raise
+        _, total = _content_range(e.headers.get("Content-Range", ""))
+        if total == done:
+            return  # 지난번에 다 받고 rename 직전에 죽은 경우
+        tmp.unlink(missing_ok=True)
+        return _fetch(url, tmp)
+
+    with r:
+        start, _ = _content_range(r.headers.get("Content-Range", ""))
+        if done and r.status == 206 and start != done:
+            # 요청한 위치가 아닌 조각 -> 버리고 Range 없이 다시
+            r.close()
+            tmp.unlink(missing_ok=True)
+            return _fetch(url, tmp)
+
+        mode = "ab" if done and r.status == 206 else "wb"
+        if mode == "wb":
+            validator = r.headers.get("ETag") or r.headers.get("Last-Modified") or ""
+            meta.write_text(f"{url}\n{validator}")
+        with tmp.open(mode) as f:
+            for chunk in iter(lambda: r.read(1024 * 1024), b""):
+                f.write(chunk)
+
+
+def _download(url: str, out_path: Path, sha256: str = "") -> None:
     # 여기서 url 비면 죽는 구조였는데, 이제는 사실상 비지 않게 됨
     if not url:
         raise RuntimeError(f"Missing URL for {out_path.name}")
 
     tmp = out_path.with_suffix(out_path.suffix + ".download")
     print(f"[models] downloading: {url}")
-    urllib.request.urlretrieve(url, tmp)
+    _fetch(url, tmp)
+
+    if sha256:
+        got = _sha256(tmp)
+        if got.lower() != sha256.lower():
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"SHA256 mismatch for {out_path.name}: got={got}, expected={sha256}")
+
     tmp.replace(out_path)
+    tmp.with_suffix(tmp.suffix + ".meta").unlink(missing_ok=True)
     print(f"[models] saved: {out_path} ({out_path.stat().st_size/1024/1024:.2f} MB)")
 
 
@@ -54,10 +132,18 @@ def ensure_models() -> dict:
     print("[model_assets] ARC_URL set?   =", bool(arc_url))
     print("[model_assets] RETINA_URL set?=", bool(retina_url))
 
-    if not arc_path.exists():
-        _download(arc_url, arc_path)
-    if not retina_path.exists():
-        _download(retina_url, retina_path)
+    # (선택) 릴리즈 asset SHA256 검증
+    jobs = [
+        (arc_url, arc_path, os.getenv("ARC_MODEL_SHA256", "").strip()),
+        (retina_url, retina_path, os.getenv("RETINA_MODEL_SHA256", "").strip()),
+    ]
+    jobs = [j for j in jobs if not j[1].exists()]
+
+    # cold start: 두 파일을 동시에 받음 (네트워크 대기 시간이 겹침)
+    if jobs:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            for fut in [pool.submit(_download, *j) for j in jobs]:
+                fut.result()
 
     print("[models] done.")
     return {"arcface": str(arc_path), "retinaface": str(retina_path)}
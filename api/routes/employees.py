@@ -1,19 +1,114 @@
 # api/routes/employees.py
 from __future__ import annotations
 
-from typing import Any, List, Optional
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional, Set
 
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 
 from api.supabase_client import get_supabase
-from api.common import execute_or_500, get_data, get_one_or_404
+from api.common import execute_or_500_async, get_data, get_one_or_404
+from api.routes.recognize import invalidate_employee_brief, invalidate_gallery
 from api.schemas import EmployeeCreateRequest, EmployeeUpdateRequest, EmployeeResponse
 
 router = APIRouter(prefix="/employees", tags=["employees"])
+logger = logging.getLogger(__name__)
+
+
+# EmployeeResponse에 실리는 컬럼만 가져온다 (created_at 등은 어차피 응답에서 버려짐)
+EMPLOYEE_COLUMNS = "employee_id, employee_code, name, is_active, role"
+
+# join 쿼리가 이 시간 안에 안 끝나면 plain select + has_face 보조 조회로 넘어감
+JOIN_TIMEOUT_SEC = 2.0
+
+# has_face를 DB에서 EXISTS로 계산하는 RPC (있으면 1 쿼리로 끝남).
+# Supabase SQL editor에서 한 번 생성:
+#
+#   create or replace function employees_with_has_face(
+#       p_limit int, p_query text default null, p_is_active boolean default null)
+#   returns table (employee_id bigint, employee_code text, name text,
+#                  is_active boolean, role text, has_face boolean)
+#   language sql stable as $$
+#     select e.employee_id, e.employee_code, e.name, e.is_active, e.role,
+#            exists (select 1 from persons p
+#                    join face_embeddings f on f.person_id = p.id
+#                    where p.employee_id = e.employee_id) as has_face
+#     from employees e
+#     where (p_is_active is null or e.is_active = p_is_active)
+#       and (p_query is null
+#            or e.name ilike '%' || p_query || '%'
+#            or e.employee_code ilike '%' || p_query || '%')
+#     limit p_limit;
+#   $$;
+#
+# 함수가 없거나 스키마/권한 문제(_is_schema_error)면 이후로는 시도하지 않고 join/fallback 경로만 사용.
+# 그 외(네트워크 등 일시적) 오류는 RPC_RETRY_SEC 동안만 건너뛰고 다시 시도.
+HAS_FACE_RPC = "employees_with_has_face"
+RPC_RETRY_SEC = 30.0
+_rpc_state = {"available": True, "retry_at": 0.0}
+
+# persons(face_embeddings) embed가 스키마상 불가능하면(FK 없음 등) join을 더 보내지 않음.
+# timeout은 일시적일 수 있으므로 계속 시도.
+_join_state = {"available": True}
+
+
+def _is_schema_error(e: Exception) -> bool:
+    """
+    재시도해도 소용없는 PostgREST/Postgres 오류인지.
+    PGRST200~204: relationship/function/column을 찾을 수 없음,
+    42xxx: undefined table/column/function, 권한 없음(42501) 등.
+    """
+    code = str(getattr(e, "code", "") or "")
+    return code in ("PGRST200", "PGRST201", "PGRST202", "PGRST203", "PGRST204") or code.startswith("42")
+
+
+def _has_face_from_embed(rel: Any) -> bool:
+    """employees.select("..., persons(face_embeddings(id))")의 persons 값 -> has_face."""
+    if isinstance(rel, dict):
+        rel = [rel]
+    if not isinstance(rel, list):
+        return False
+    return any((p or {}).get("face_embeddings") for p in rel)
+
+
+def _discard(task: "asyncio.Future[Any]") -> None:
+    # 버려진 task의 예외가 "never retrieved" 경고로 남지 않게
+    # (asyncio 래퍼만 취소됨. threadpool에서 돌던 쿼리 자체는 끝까지 실행된다)
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _face_employee_ids(sb: Any, emp_ids: List[Any]) -> Set[Any]:
+    # Render schema: employees(employee_id) -> persons(employee_id) -> face_embeddings(person_id)
+    face_emp_set: Set[Any] = set()
+
+    # 1) map employees -> person ids
+    persons_resp = await execute_or_500_async(
+        lambda: sb.table("persons").select("id, employee_id").in_("employee_id", emp_ids).execute(),
+        "list persons for has_face",
+    )
+    person_rows = get_data(persons_resp)
+    emp_by_person = {pr["id"]: pr.get("employee_id") for pr in person_rows if pr.get("id")}
+    person_ids = list(emp_by_person.keys())
+
+    # 2) check which persons have embeddings
+    if person_ids:
+        emb_resp = await execute_or_500_async(
+            lambda: sb.table("face_embeddings").select("person_id").in_("person_id", person_ids).execute(),
+            "list face_embeddings for has_face",
+        )
+        for er in get_data(emb_resp):
+            pid = er.get("person_id")
+            if pid in emp_by_person and emp_by_person[pid] is not None:
+                face_emp_set.add(emp_by_person[pid])
+    return face_emp_set
 
 
 @router.get("", response_model=List[EmployeeResponse])
-def list_employees(
+async def list_employees(
     # UI/api_client.py가 query= 로 보냄 :contentReference[oaicite:2]{index=2}
     query: Optional[str] = Query(default=None),
     limit: int = Query(default=200, ge=1, le=2000),
@@ -21,42 +116,54 @@ def list_employees(
 ) -> Any:
     sb = get_supabase()
 
-    def _run():
-        q = sb.table("employees").select("*").limit(limit)
+    if _rpc_state["available"] and time.monotonic() >= _rpc_state["retry_at"]:
+        params = {"p_limit": limit, "p_query": query or None, "p_is_active": is_active}
+        try:
+            resp = await run_in_threadpool(lambda: sb.rpc(HAS_FACE_RPC, params).execute())
+            return get_data(resp)
+        except Exception as e:
+            if _is_schema_error(e):
+                _rpc_state["available"] = False
+                logger.warning("%s RPC disabled (code=%s)", HAS_FACE_RPC, getattr(e, "code", None), exc_info=True)
+            else:
+                _rpc_state["retry_at"] = time.monotonic() + RPC_RETRY_SEC
+                logger.warning("%s RPC failed; retry in %.0fs", HAS_FACE_RPC, RPC_RETRY_SEC, exc_info=True)
+
+    def _run(columns: str):
+        q = sb.table("employees").select(columns).limit(limit)
         if is_active is not None:
             q = q.eq("is_active", is_active)
         if query:
             q = q.or_(f"name.ilike.%{query}%,employee_code.ilike.%{query}%")
         return q.execute()
 
-    resp = execute_or_500(_run, "list employees")
-    rows = get_data(resp)
+    # has_face까지 한 번에 가져오는 join 쿼리를 먼저 보내고,
+    # JOIN_TIMEOUT_SEC 안에 실패/지연될 때만 plain select + 보조 조회로 has_face를 채운다.
+    # (threadpool 작업은 취소가 안 되므로 timeout 시에는 join이 백그라운드에서 끝까지 돌고
+    #  그 요청에 한해 쿼리가 2번 나감. 정상 경로는 쿼리 1번)
+    if _join_state["available"]:
+        join_task = asyncio.ensure_future(run_in_threadpool(_run, f"{EMPLOYEE_COLUMNS}, persons(face_embeddings(id))"))
 
-    # has_face 붙이기
-    # Render schema: employees(employee_id) -> persons(employee_id) -> face_embeddings(person_id)
-    emp_ids = [r.get("employee_id") for r in rows if r.get("employee_id") is not None]
-    face_emp_set = set()
+        try:
+            join_resp = await asyncio.wait_for(join_task, timeout=JOIN_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            join_resp = None
+            _discard(join_task)
+        except Exception as e:
+            join_resp = None
+            if _is_schema_error(e):
+                _join_state["available"] = False
+                logger.warning("has_face join disabled (code=%s)", getattr(e, "code", None), exc_info=True)
 
-    if emp_ids:
-        # 1) map employees -> person ids
-        persons_resp = execute_or_500(
-            lambda: sb.table("persons").select("id, employee_id").in_("employee_id", emp_ids).execute(),
-            "list persons for has_face",
-        )
-        person_rows = get_data(persons_resp)
-        emp_by_person = {pr["id"]: pr.get("employee_id") for pr in person_rows if pr.get("id")}
-        person_ids = list(emp_by_person.keys())
-
-        # 2) check which persons have embeddings
-        if person_ids:
-            emb_resp = execute_or_500(
-                lambda: sb.table("face_embeddings").select("person_id").in_("person_id", person_ids).execute(),
-                "list face_embeddings for has_face",
-            )
-            for er in get_data(emb_resp):
-                pid = er.get("person_id")
-                if pid in emp_by_person and emp_by_person[pid] is not None:
-                    face_emp_set.add(emp_by_person[pid])
+        if join_resp is not None:
+            rows = get_data(join_resp)
+            for r in rows:
+                r["has_face"] = _has_face_from_embed(r.pop("persons", None))
+            return rows
+
+    rows = get_data(await execute_or_500_async(lambda: _run(EMPLOYEE_COLUMNS), "list employees"))
+    emp_ids = [r.get("employee_id") for r in rows if r.get("employee_id") is not None]
+    face_emp_set = await _face_employee_ids(sb, emp_ids) if emp_ids else set()
 
     for r in rows:
         r["has_face"] = r.get("employee_id") in face_emp_set
@@ -65,16 +172,16 @@ def list_employees(
 
 
 @router.get("/{employee_id}", response_model=EmployeeResponse)
-def get_employee(employee_id: int) -> Any:
+async def get_employee(employee_id: int) -> Any:
     sb = get_supabase()
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("employees").select("*").eq("employee_id", employee_id).maybe_single().execute(),
         "get employee",
     )
     row = get_one_or_404(resp, "Employee not found")
 
     # has_face: persons -> face_embeddings
-    p = execute_or_500(
+    p = await execute_or_500_async(
         lambda: sb.table("persons").select("id").eq("employee_id", employee_id).maybe_single().execute(),
         "get person for has_face",
     )
@@ -84,7 +191,7 @@ def get_employee(employee_id: int) -> Any:
         return row
 
     person_id = p_rows[0].get("id")
-    face_resp = execute_or_500(
+    face_resp = await execute_or_500_async(
         lambda: sb.table("face_embeddings").select("id").eq("person_id", person_id).limit(1).execute(),
         "get face_embeddings",
     )
@@ -93,11 +200,11 @@ def get_employee(employee_id: int) -> Any:
 
 
 @router.post("", response_model=EmployeeResponse)
-def create_employee(body: EmployeeCreateRequest) -> Any:
+async def create_employee(body: EmployeeCreateRequest) -> Any:
     sb = get_supabase()
     payload = body.model_dump(exclude_none=True)
 
-    resp = execute_or_500(lambda: sb.table("employees").insert(payload).execute(), "create employee")
+    resp = await execute_or_500_async(lambda: sb.table("employees").insert(payload).execute(), "create employee")
     row = get_one_or_404(resp, "Insert failed (no row returned)")
 
     # 새로 만든 직원은 기본적으로 face 없음
@@ -106,19 +213,20 @@ def create_employee(body: EmployeeCreateRequest) -> Any:
 
 
 @router.patch("/{employee_id}", response_model=EmployeeResponse)
-def update_employee(employee_id: int, body: EmployeeUpdateRequest) -> Any:
+async def update_employee(employee_id: int, body: EmployeeUpdateRequest) -> Any:
     sb = get_supabase()
     payload = body.model_dump(exclude_none=True)
     if not payload:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("employees").update(payload).eq("employee_id", employee_id).execute(),
         "update employee",
     )
     row = get_one_or_404(resp, "Employee not found")
+    invalidate_employee_brief(employee_id)  # name/is_active 변경이 recognize에 바로 반영되게
 
-    p = execute_or_500(
+    p = await execute_or_500_async(
         lambda: sb.table("persons").select("id").eq("employee_id", employee_id).maybe_single().execute(),
         "get person for has_face",
     )
@@ -128,7 +236,7 @@ def update_employee(employee_id: int, body: EmployeeUpdateRequest) -> Any:
         return row
 
     person_id = p_rows[0].get("id")
-    face_resp = execute_or_500(
+    face_resp = await execute_or_500_async(
         lambda: sb.table("face_embeddings").select("id").eq("person_id", person_id).limit(1).execute(),
         "get face_embeddings",
     )
@@ -137,12 +245,15 @@ def update_employee(employee_id: int, body: EmployeeUpdateRequest) -> Any:
 
 
 @router.delete("/{employee_id}")
-def delete_employee(employee_id: int) -> Any:
+async def delete_employee(employee_id: int) -> Any:
     sb = get_supabase()
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("employees").delete().eq("employee_id", employee_id).execute(),
         "delete employee",
     )
+    # 삭제된 직원의 임베딩/정보가 recognize 캐시에 남지 않게
+    invalidate_gallery()
+    invalidate_employee_brief(employee_id)
     deleted = get_data(resp)
     if not deleted:
         raise HTTPException(status_code=404, detail="Employee not found or already deleted")
@@ -6,24 +6,25 @@ from typing import Any, List, Optional
 import numpy as np
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 
-from api.common import execute_or_500, get_data
-from api.embedding import get_embedding_from_image_bytes
+from api.common import execute_or_500_async, get_data
+from api.routes.recognize import invalidate_gallery
+from api.embedding import get_embedding_async
 from api.supabase_client import get_supabase
 
 router = APIRouter(prefix="/faces", tags=["faces"])
 
 
-def vec_to_pgvector_str(v: np.ndarray) -> str:
-    v = v.astype(np.float32).tolist()
-    return "[" + ",".join(f"{x:.8f}" for x in v) + "]"
+def vec_to_pgvector(v: np.ndarray) -> List[float]:
+    # PostgREST가 JSON 배열을 pgvector로 그대로 캐스팅하므로 문자열 포맷 불필요
+    return np.asarray(v, dtype=np.float32).reshape(-1).tolist()
 
 
-def _ensure_person(employee_id: int) -> str:
+async def _ensure_person(employee_id: int) -> str:
     """Ensure persons row exists for employee_id and return persons.id (UUID string)."""
     sb = get_supabase()
 
     # 1) try existing person
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("persons").select("id, employee_id").eq("employee_id", employee_id).maybe_single().execute(),
         "get person",
     )
@@ -34,7 +35,7 @@ def _ensure_person(employee_id: int) -> str:
     # 2) create person (optionally attach name from employees)
     emp_name: Optional[str] = None
     try:
-        emp = execute_or_500(
+        emp = await execute_or_500_async(
             lambda: sb.table("employees").select("name").eq("employee_id", employee_id).maybe_single().execute(),
             "fetch employee name",
         )
@@ -48,7 +49,7 @@ def _ensure_person(employee_id: int) -> str:
     if emp_name:
         insert_payload["name"] = emp_name
 
-    created = execute_or_500(
+    created = await execute_or_500_async(
         lambda: sb.table("persons").insert(insert_payload).execute(),
         "create person",
     )
@@ -59,9 +60,9 @@ def _ensure_person(employee_id: int) -> str:
 
 
 @router.get("")
-def list_faces(limit: int = 200) -> List[Any]:
+async def list_faces(limit: int = 200) -> List[Any]:
     sb = get_supabase()
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         # Render schema: face_embeddings references persons(person_id)
         lambda: sb.table("face_embeddings")
         .select("id, person_id, model_name, model_version, created_at, persons(employee_id,name)")
@@ -73,10 +74,10 @@ def list_faces(limit: int = 200) -> List[Any]:
 
 
 @router.get("/{employee_id}")
-def get_face(employee_id: int) -> Any:
+async def get_face(employee_id: int) -> Any:
     sb = get_supabase()
     # Resolve to person
-    p = execute_or_500(
+    p = await execute_or_500_async(
         lambda: sb.table("persons").select("id, employee_id, name").eq("employee_id", employee_id).maybe_single().execute(),
         "get person",
     )
@@ -85,7 +86,7 @@ def get_face(employee_id: int) -> Any:
         raise HTTPException(status_code=404, detail="Person not found for employee")
     person_id = p_rows[0]["id"]
 
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("face_embeddings")
         .select("id, person_id, model_name, model_version, created_at")
         .eq("person_id", person_id)
@@ -110,14 +111,14 @@ async def enroll_face(
     if not img:
         raise HTTPException(status_code=400, detail="Empty image")
 
-    emb = get_embedding_from_image_bytes(img)
-    emb_str = vec_to_pgvector_str(emb)
+    emb = await get_embedding_async(img)
+    emb_vec = vec_to_pgvector(emb)
 
     sb = get_supabase()
-    person_id = _ensure_person(employee_id)
+    person_id = await _ensure_person(employee_id)
 
     # Keep 1 active embedding per person by default (delete-then-insert)
-    execute_or_500(
+    await execute_or_500_async(
         lambda: sb.table("face_embeddings").delete().eq("person_id", person_id).execute(),
         "delete old embeddings",
     )
@@ -126,20 +127,21 @@ async def enroll_face(
         "person_id": person_id,
         "model_name": model_name,
         "model_version": model_version,
-        "embedding": emb_str,
+        "embedding": emb_vec,
     }
 
-    execute_or_500(
+    await execute_or_500_async(
         lambda: sb.table("face_embeddings").insert(payload).execute(),
         "enroll face (insert face_embeddings)",
     )
+    invalidate_gallery()
     return {"ok": True, "employee_id": employee_id, "person_id": person_id}
 
 
 @router.delete("/{employee_id}")
-def delete_face(employee_id: int) -> Any:
+async def delete_face(employee_id: int) -> Any:
     sb = get_supabase()
-    p = execute_or_500(
+    p = await execute_or_500_async(
         lambda: sb.table("persons").select("id").eq("employee_id", employee_id).maybe_single().execute(),
         "get person",
     )
@@ -148,10 +150,11 @@ def delete_face(employee_id: int) -> Any:
         raise HTTPException(status_code=404, detail="Person not found")
 
     person_id = p_rows[0]["id"]
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("face_embeddings").delete().eq("person_id", person_id).execute(),
         "delete face embeddings",
     )
+    invalidate_gallery()
     if not get_data(resp):
         raise HTTPException(status_code=404, detail="No embeddings found or already deleted")
     return {"ok": True, "employee_id": employee_id}
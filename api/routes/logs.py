@@ -5,7 +5,7 @@ from typing import Any, List, Optional
 
 from fastapi import APIRouter, HTTPException, Query
 
-from api.common import execute_or_500, get_data, get_one_or_404
+from api.common import execute_or_500_async, get_data, get_one_or_404
 from api.supabase_client import get_supabase
 from api.schemas import (
     AttendanceLogCreateRequest,
@@ -15,15 +15,25 @@ from api.schemas import (
 
 router = APIRouter(prefix="/logs", tags=["logs"])
 
+# list_logs는 항상 event_time DESC + LIMIT (+ since 범위) 로 조회하므로
+# 인덱스가 없으면 테이블 전체 scan + sort. Supabase SQL editor에서 한 번 생성:
+#
+#   create index concurrently if not exists idx_attendance_logs_event_time_desc
+#       on attendance_logs (event_time desc);
+#
+# 인덱스가 있으면 최신 N개 / since 이후 row만 index range scan으로 읽음.
+
 
 @router.get("", response_model=List[AttendanceLogResponse])
-def list_logs(
+async def list_logs(
     limit: int = Query(default=200, ge=1, le=2000),
     employee_id: Optional[int] = Query(default=None),
     camera_id: Optional[str] = Query(default=None),
     event_type: Optional[str] = Query(default=None),
     recognized: Optional[bool] = Query(default=None),
     order_desc: bool = Query(default=True),
+    # 증분 조회용 커서: event_time >= since 인 row만 반환 (경계 row는 클라이언트가 log_id로 중복 제거)
+    since: Optional[str] = Query(default=None),
 ) -> Any:
     sb = get_supabase()
 
@@ -37,17 +47,19 @@ def list_logs(
             q = q.eq("event_type", event_type)
         if recognized is not None:
             q = q.eq("recognized", recognized)
+        if since:
+            q = q.gte("event_time", since)
         q = q.order("event_time", desc=order_desc)
         return q.execute()
 
-    resp = execute_or_500(_run, "list logs")
+    resp = await execute_or_500_async(_run, "list logs")
     return get_data(resp)
 
 
 @router.get("/{log_id}", response_model=AttendanceLogResponse)
-def get_log(log_id: int) -> Any:
+async def get_log(log_id: int) -> Any:
     sb = get_supabase()
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("attendance_logs").select("*").eq("log_id", log_id).maybe_single().execute(),
         "get log",
     )
@@ -55,22 +67,22 @@ def get_log(log_id: int) -> Any:
 
 
 @router.post("", response_model=AttendanceLogResponse)
-def create_log(body: AttendanceLogCreateRequest) -> Any:
+async def create_log(body: AttendanceLogCreateRequest) -> Any:
     sb = get_supabase()
     payload = body.model_dump(exclude_none=True)
 
-    resp = execute_or_500(lambda: sb.table("attendance_logs").insert(payload).execute(), "create log")
+    resp = await execute_or_500_async(lambda: sb.table("attendance_logs").insert(payload).execute(), "create log")
     return get_one_or_404(resp, "Insert failed (no row returned)")
 
 
 @router.patch("/{log_id}", response_model=AttendanceLogResponse)
-def update_log(log_id: int, body: AttendanceLogUpdateRequest) -> Any:
+async def update_log(log_id: int, body: AttendanceLogUpdateRequest) -> Any:
     sb = get_supabase()
     payload = body.model_dump(exclude_none=True)
     if not payload:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("attendance_logs").update(payload).eq("log_id", log_id).execute(),
         "update log",
     )
@@ -78,9 +90,9 @@ def update_log(log_id: int, body: AttendanceLogUpdateRequest) -> Any:
 
 
 @router.delete("/{log_id}")
-def delete_log(log_id: int) -> Any:
+async def delete_log(log_id: int) -> Any:
     sb = get_supabase()
-    resp = execute_or_500(
+    resp = await execute_or_500_async(
         lambda: sb.table("attendance_logs").delete().eq("log_id", log_id).execute(),
         "delete log",
     )
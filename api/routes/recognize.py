@@ -1,21 +1,32 @@
 # api/routes/recognize.py
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 import traceback
 import numpy as np
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
 
 from api.supabase_client import get_supabase
-from api.embedding import get_embedding_from_image_bytes
+from api.embedding import get_embedding_async
 
 router = APIRouter(tags=["recognize"])
 
 # ✅ DB enum(event_type)에 맞춰 강제 통일
 VALID_EVENT_TYPES = {"CHECK_IN", "CHECK_OUT"}
 
+# 등록 임베딩 인덱스 재사용 시간 (enroll/delete 시에는 즉시 무효화)
+GALLERY_TTL_SEC = float(os.getenv("GALLERY_TTL_SEC", "30"))
+
+# 직원 brief(name/code/is_active) 캐시 시간 (update/delete 시에는 즉시 무효화)
+EMPLOYEE_CACHE_TTL_SEC = float(os.getenv("EMPLOYEE_CACHE_TTL_SEC", "60"))
+
 
 # -----------------------------
 # Utilities
@@ -77,13 +88,6 @@ def _parse_pgvector(v: Any) -> Optional[np.ndarray]:
     return None
 
 
-def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
-    if denom == 0:
-        return -1.0
-    return float(np.dot(a, b) / denom)
-
-
 def _ensure_camera_exists(camera_id: str) -> None:
     """
     attendance_logs.camera_id는 cameras.camera_id FK라서
@@ -132,6 +136,111 @@ def _extract_employee_id_from_row(row: Dict[str, Any]) -> Optional[int]:
     return None
 
 
+# -----------------------------
+# Gallery index (in-memory)
+# -----------------------------
+# face_embeddings 전체를 매 요청마다 fetch/parse 하지 않고,
+# L2 정규화된 (N, D) 행렬로 한 번 만들어 두고 matvec 한 번으로 검색한다.
+# dim별로 분리 (query와 dim이 다른 행은 원래도 건너뜀)
+Gallery = Dict[int, Tuple[np.ndarray, List[Optional[int]]]]
+
+_GALLERY_LOCK = threading.Lock()
+# gen: invalidate_gallery()마다 증가. build 도중 무효화되면 그 결과는 캐시에 넣지 않음
+_GALLERY: Dict[str, Any] = {"ts": 0.0, "index": None, "gen": 0}
+
+
+def _build_gallery(rows: List[Dict[str, Any]]) -> Gallery:
+    vecs: Dict[int, List[np.ndarray]] = {}
+    ids: Dict[int, List[Optional[int]]] = {}
+    for r in rows:
+        emb = _parse_pgvector(r.get("embedding"))
+        if emb is None:
+            continue
+        d = int(emb.shape[0])
+        vecs.setdefault(d, []).append(emb)
+        ids.setdefault(d, []).append(_extract_employee_id_from_row(r))
+
+    gallery: Gallery = {}
+    for d, v in vecs.items():
+        # 행 단위 norm/나눗셈을 한 번에 (zero-norm 행은 제외)
+        matrix = np.stack(v).astype(np.float32, copy=False)
+        norms = np.linalg.norm(matrix, axis=1)
+        keep = norms > 0
+        matrix = matrix[keep] / norms[keep, None]
+        if matrix.shape[0]:
+            gallery[d] = (np.ascontiguousarray(matrix), [e for e, k in zip(ids[d], keep) if k])
+    return gallery
+
+
+def _get_gallery(limit: int = 2000) -> Gallery:
+    now = time.monotonic()
+    with _GALLERY_LOCK:
+        index = _GALLERY["index"]
+        if index is not None and now - _GALLERY["ts"] < GALLERY_TTL_SEC:
+            return index
+        gen = _GALLERY["gen"]
+
+    index = _build_gallery(_fetch_all_embeddings(limit))
+    with _GALLERY_LOCK:
+        # fetch 이후 enroll/delete가 있었으면 stale -> 저장하지 않고 다음 요청이 다시 로드
+        if _GALLERY["gen"] == gen:
+            _GALLERY["index"] = index
+            _GALLERY["ts"] = now
+    return index
+
+
+def invalidate_gallery() -> None:
+    """enroll/delete 후 호출 -> 다음 recognize에서 다시 로드."""
+    with _GALLERY_LOCK:
+        _GALLERY["index"] = None
+        _GALLERY["gen"] += 1
+
+
+def _search_gallery(gallery: Gallery, query_emb: np.ndarray) -> Tuple[Optional[int], float]:
+    """(best employee_id, best cosine similarity). 후보 없으면 (None, -1.0)."""
+    entry = gallery.get(int(query_emb.shape[0]))
+    qn = float(np.linalg.norm(query_emb))
+    if entry is None or qn == 0:
+        return None, -1.0
+
+    matrix, emp_ids = entry
+    sims = matrix @ (query_emb / qn)
+    i = int(np.argmax(sims))
+    return emp_ids[i], float(sims[i])
+
+
+# 같은 직원이 하루에 여러 번 출퇴근 -> 매 인식마다 employees 조회하지 않도록
+_EMP_CACHE_LOCK = threading.Lock()
+_EMP_CACHE: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_EMP_CACHE_GEN = {"gen": 0}  # invalidate마다 증가 (fetch 도중 무효화된 결과는 저장 안 함)
+
+
+def invalidate_employee_brief(employee_id: Optional[int] = None) -> None:
+    """employee update/delete 후 호출. None이면 전체 비움."""
+    with _EMP_CACHE_LOCK:
+        _EMP_CACHE_GEN["gen"] += 1
+        if employee_id is None:
+            _EMP_CACHE.clear()
+        else:
+            _EMP_CACHE.pop(int(employee_id), None)
+
+
+def _get_employee_brief(employee_id: int) -> Dict[str, Any]:
+    now = time.monotonic()
+    with _EMP_CACHE_LOCK:
+        hit = _EMP_CACHE.get(employee_id)
+        gen = _EMP_CACHE_GEN["gen"]
+    if hit is not None and now - hit[0] < EMPLOYEE_CACHE_TTL_SEC:
+        return hit[1]
+
+    brief = _fetch_employee_brief(employee_id)
+    if brief:
+        with _EMP_CACHE_LOCK:
+            if _EMP_CACHE_GEN["gen"] == gen:
+                _EMP_CACHE[employee_id] = (now, brief)
+    return brief
+
+
 def _fetch_employee_brief(employee_id: int) -> Dict[str, Any]:
     sb = get_supabase()
     resp = (
@@ -188,31 +297,57 @@ async def recognize(
     event_type: str = Form(...),
     camera_id: str = Form(...),
     threshold: float = Form(0.35),
+) -> Dict[str, Any]:
+    return await _recognize_bytes(await file.read(), event_type, camera_id, threshold)
+
+
+@router.post("/recognize/raw")
+async def recognize_raw(
+    request: Request,
+    event_type: str = Query(...),
+    camera_id: str = Query(...),
+    threshold: float = Query(0.35),
+) -> Dict[str, Any]:
+    # multipart 파싱(임시 파일/경계 문자열 처리) 없이 body(JPEG bytes)를 그대로 받음
+    return await _recognize_bytes(await request.body(), event_type, camera_id, threshold)
+
+
+async def _recognize_bytes(
+    img_bytes: bytes,
+    event_type: str,
+    camera_id: str,
+    threshold: float,
 ) -> Dict[str, Any]:
     try:
         # ✅ 0) event_type normalize (DB enum 불일치 방지)
         event_type = _normalize_event_type(event_type)
 
-        # 1) camera FK 보장
         camera_id = (camera_id or "").strip()
         if not camera_id:
             raise HTTPException(status_code=400, detail="camera_id is required")
-        _ensure_camera_exists(camera_id)
 
-        # 2) 이미지 -> 임베딩
-        img_bytes = await file.read()
         if not img_bytes:
             raise HTTPException(status_code=400, detail="empty file")
 
-        try:
-            query_emb = get_embedding_from_image_bytes(img_bytes).astype(np.float32)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail={"msg": "embedding failed", "error": repr(e)})
-
-        # 3) DB 임베딩 fetch -> best match
-        rows = _fetch_all_embeddings(limit=2000)
-        if not rows:
-            log_row = _insert_attendance_log(
+        async def _embed() -> np.ndarray:
+            # 동시에 들어온 recognize/enroll 요청과 micro-batch로 묶여서 ArcFace 1회 실행
+            try:
+                return (await get_embedding_async(img_bytes)).astype(np.float32)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail={"msg": "embedding failed", "error": repr(e)})
+
+        # 1) camera FK 보장 / 2) 이미지 -> 임베딩 / 3) 등록 임베딩 인덱스 (TTL 캐시)
+        # 서로 독립적이라 동시에 실행 (DB 호출은 threadpool, event loop도 막지 않음)
+        _, query_emb, gallery = await asyncio.gather(
+            run_in_threadpool(_ensure_camera_exists, camera_id),
+            _embed(),
+            run_in_threadpool(_get_gallery, 2000),
+        )
+
+        # 3) best match
+        if not gallery:
+            log_row = await run_in_threadpool(
+                _insert_attendance_log,
                 event_type=event_type,
                 camera_id=camera_id,
                 recognized=False,
@@ -233,31 +368,20 @@ async def recognize(
                 "message": "No enrolled faces found in DB.",
             }
 
-        best_emp_id: Optional[int] = None
-        best_sim: float = -1.0
-
-        for r in rows:
-            emb = _parse_pgvector(r.get("embedding"))
-            if emb is None:
-                continue
-            if emb.shape[0] != query_emb.shape[0]:
-                continue
-            sim = _cosine_similarity(query_emb, emb)
-            if sim > best_sim:
-                best_sim = sim
-                best_emp_id = _extract_employee_id_from_row(r)
+        best_emp_id, best_sim = _search_gallery(gallery, query_emb)
 
         recognized = bool(best_emp_id is not None and best_sim >= float(threshold))
 
         # 4) 직원 정보 + (원하면 비활성 제외)
         emp_brief: Dict[str, Any] = {}
         if recognized and best_emp_id is not None:
-            emp_brief = _fetch_employee_brief(int(best_emp_id))
+            emp_brief = await run_in_threadpool(_get_employee_brief, int(best_emp_id))
             if emp_brief.get("is_active") is False:
                 recognized = False
 
-        # 5) 로그 저장
-        log_row = _insert_attendance_log(
+        # 5) 로그 저장 (동기 supabase insert라 threadpool에서, event loop 막지 않게)
+        log_row = await run_in_threadpool(
+            _insert_attendance_log,
             event_type=event_type,
             camera_id=camera_id,
             recognized=recognized,
@@ -2,26 +2,21 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from functools import lru_cache
 
 from dotenv import load_dotenv
 from supabase import create_client, Client
 
 load_dotenv()
 
-_supabase: Optional[Client] = None
-
 
+@lru_cache(maxsize=1)
 def get_supabase() -> Client:
-    global _supabase
-    if _supabase is not None:
-        return _supabase
-
+    # 프로세스 당 1개 클라이언트를 모든 라우트가 공유 (HTTP 커넥션 재사용)
     url = os.getenv("SUPABASE_URL", "").strip()
     key = os.getenv("SUPABASE_KEY", "").strip()
 
     if not url or not key:
         raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY in environment (.env)")
 
-    _supabase = create_client(url, key)
-    return _supabase
+    return create_client(url, key)
@@ -2,10 +2,17 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except Exception:
+    orjson = None
 
 load_dotenv()
 
@@ -14,7 +21,9 @@ API_TOKEN = os.getenv("API_TOKEN", "").strip()  # 있으면 사용, 없으면 
 
 
 class ApiError(RuntimeError):
-    pass
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code  # 마지막 시도의 HTTP status (연결 실패면 None)
 
 
 def _headers() -> Dict[str, str]:
@@ -24,6 +33,13 @@ def _headers() -> Dict[str, str]:
     return h
 
 
+def _json(r: requests.Response) -> Any:
+    # orjson이 있으면 bytes에서 바로 decode (requests .json()보다 빠름, 큰 /logs 응답에서 차이 큼)
+    if orjson is not None:
+        return orjson.loads(r.content)
+    return r.json()
+
+
 def _base(api_base: Optional[str]) -> str:
     b = (api_base or DEFAULT_API_BASE).rstrip("/")
     if not b:
@@ -31,26 +47,65 @@ def _base(api_base: Optional[str]) -> str:
     return b
 
 
-def _try_urls(method: str, urls: List[str], *, timeout: float = 30, **kwargs) -> Any:
+def new_session(pool_size: int = 4) -> requests.Session:
+    """
+    keep-alive 커넥션을 재사용하는 Session 생성.
+    (스캔처럼 반복 호출되는 경로에서 매번 connect/TLS handshake 하지 않도록)
+    - Render 재시작/콜드스타트 중 502/503/504는 짧은 backoff로 재시도
+      (GET 등 멱등 요청만; POST recognize/enroll은 로그/등록 중복 방지를 위해 재시도 안 함)
+    """
+    s = requests.Session()
+    retry = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,  # 마지막 응답은 _try_urls가 평소처럼 처리
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+# 모든 API 호출이 공유하는 keep-alive Session (호출마다 TCP/TLS 연결 새로 안 맺도록)
+_SESSION = new_session(pool_size=10)
+
+
+def _try_urls(
+    method: str,
+    urls: List[str],
+    *,
+    timeout: float = 30,
+    session: Optional[requests.Session] = None,
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs,
+) -> Any:
     """
     여러 URL fallback 시도.
     - 성공(2xx/3xx): JSON이면 JSON, 아니면 text 반환
     - 실패(4xx/5xx): 가능한 한 서버가 준 JSON(detail/trace)을 포함해 에러 메시지에 담음
+    - session이 주어지면 해당 Session, 아니면 모듈 공용 _SESSION으로 요청 (커넥션 재사용)
+    - headers: 인증 헤더에 추가로 붙일 헤더 (예: Content-Type)
     """
     last_err: Optional[str] = None
+    last_status: Optional[int] = None
+    http = session if session is not None else _SESSION
+    h = {**_headers(), **headers} if headers else _headers()
 
     for url in urls:
         try:
-            r = requests.request(method, url, headers=_headers(), timeout=timeout, **kwargs)
+            r = http.request(method, url, headers=h, timeout=timeout, **kwargs)
             ctype = (r.headers.get("content-type") or "").lower()
 
             if r.status_code < 400:
-                return r.json() if "application/json" in ctype else r.text
+                return _json(r) if "application/json" in ctype else r.text
+            last_status = r.status_code
 
             # 실패: JSON이면 JSON을 최대한 살려서 노출
             if "application/json" in ctype:
                 try:
-                    j = r.json()
+                    j = _json(r)
                     last_err = f"{r.status_code} {str(j)[:1200]}"
                 except Exception:
                     last_err = f"{r.status_code} {r.text[:1200]}"
@@ -59,8 +114,9 @@ def _try_urls(method: str, urls: List[str], *, timeout: float = 30, **kwargs) ->
 
         except Exception as e:
             last_err = str(e)
+            last_status = None
 
-    raise ApiError(f"API call failed. Tried: {urls}\nLast error: {last_err}")
+    raise ApiError(f"API call failed. Tried: {urls}\nLast error: {last_err}", status_code=last_status)
 
 
 def _as_list(res: Any) -> List[Dict[str, Any]]:
@@ -199,10 +255,13 @@ def delete_face(employee_id: int, api_base: str = "") -> Dict[str, Any]:
 # =========================
 # Logs (attendance_logs)
 # =========================
-def fetch_logs(limit: int = 200, api_base: str = "") -> List[Dict[str, Any]]:
+def fetch_logs(limit: int = 200, api_base: str = "", since: Optional[str] = None) -> List[Dict[str, Any]]:
     b = _base(api_base)
     url = f"{b}/logs"
-    res = _try_urls("GET", [url], params={"limit": limit})
+    params: Dict[str, Any] = {"limit": limit}
+    if since:
+        params["since"] = since  # event_time >= since 인 로그만
+    res = _try_urls("GET", [url], params=params)
     return _as_list(res)
 
 
@@ -314,14 +373,46 @@ def delete_schedule(schedule_id: int, api_base: str = "") -> Dict[str, Any]:
 # =========================
 # Recognize
 # =========================
-def recognize(image_bytes: bytes, event_type: str, camera_id: str, api_base: str = "") -> Dict[str, Any]:
+# /recognize/raw 지원 여부 (이전 버전 서버면 첫 404/405 이후 False)
+_RAW_RECOGNIZE = {"available": True}
+
+
+def recognize(
+    image_bytes: bytes,
+    event_type: str,
+    camera_id: str,
+    api_base: str = "",
+    session: Optional[requests.Session] = None,
+) -> Dict[str, Any]:
     """
     event_type: 보통 "CHECK_IN" | "CHECK_OUT" 권장
     camera_id: 스키마 상 cameras.camera_id (TEXT)
+    image_bytes: JPEG bytes
+    session: new_session()으로 만든 Session (있으면 커넥션 재사용)
+
+    multipart 대신 /recognize/raw 로 JPEG bytes를 body에 바로 보냄 (서버 multipart 파싱 생략).
+    /recognize/raw가 없는 이전 버전 서버(404/405)면 multipart /recognize로 다시 보내고,
+    이후로는 프로세스 동안 multipart만 사용.
     """
     b = _base(api_base)
-    url = f"{b}/recognize"
+    if _RAW_RECOGNIZE["available"]:
+        try:
+            res = _try_urls(
+                "POST",
+                [f"{b}/recognize/raw"],
+                params={"event_type": event_type, "camera_id": camera_id},
+                data=image_bytes,
+                headers={"Content-Type": "image/jpeg"},
+                timeout=60,
+                session=session,
+            )
+            return _wrap_recognize_response(res)
+        except ApiError as e:
+            if e.status_code not in (404, 405):
+                raise
+            _RAW_RECOGNIZE["available"] = False
+
     files = {"file": ("frame.jpg", image_bytes, "image/jpeg")}
     data = {"event_type": event_type, "camera_id": camera_id}
-    res = _try_urls("POST", [url], files=files, data=data, timeout=60)
+    res = _try_urls("POST", [f"{b}/recognize"], files=files, data=data, timeout=60, session=session)
     return _wrap_recognize_response(res)
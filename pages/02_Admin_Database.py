@@ -31,6 +31,12 @@ def _has_face(emp: dict) -> bool:
     return False
 
 
+# has_face가 포함되므로 employee/face 생성·삭제(enroll 포함) 직후에는 반드시 _cached_employees.clear()
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_employees(api_base: str, query: str) -> list:
+    return api_service.list_employees(query=query, limit=200, api_base=api_base)
+
+
 # ----------------------------
 # state
 # ----------------------------
@@ -39,7 +45,7 @@ st.session_state.setdefault("pending_delete_emp", None)
 # ----------------------------
 # top actions
 # ----------------------------
-c1, c2 = st.columns([1, 3])
+c1, c2, c3 = st.columns([1, 3, 1])
 with c1:
     if st.button("➕ Add New Employee", use_container_width=True):
         st.session_state["show_add_employee"] = True
@@ -47,6 +53,10 @@ with c1:
 with c2:
     query = st.text_input("Search by name or ID...", value="", placeholder="Search by name or ID...")
 
+with c3:
+    if st.button("🔄 Refresh", use_container_width=True):
+        _cached_employees.clear()
+
 
 # ----------------------------
 # add employee modal-ish
@@ -68,6 +78,7 @@ if st.session_state.get("show_add_employee"):
                         st.error("Name is required.")
                     else:
                         api_service.create_employee(new_name.strip(), new_code.strip() or None, api_base=api_base)
+                        _cached_employees.clear()
                         st.success("Employee created.")
                         st.session_state["show_add_employee"] = False
                         st.rerun()
@@ -84,7 +95,7 @@ st.divider()
 # load employees
 # ----------------------------
 try:
-    employees = api_service.list_employees(query=query, limit=200, api_base=api_base)
+    employees = _cached_employees(api_base, query)
 except Exception as e:
     st.error(f"Data loading error: {e}")
     employees = []
@@ -150,6 +161,10 @@ if pending:
                     st.rerun()
                 except Exception as e:
                     st.error(f"Delete failed: {e}")
+                finally:
+                    # face만 지워지고 employee 삭제가 실패해도 has_face가 30s 동안 stale하지 않도록
+                    # (st.rerun()도 예외로 빠져나가므로 finally에서 항상 실행됨)
+                    _cached_employees.clear()
 
         with d2:
             if st.button("Cancel", use_container_width=True):
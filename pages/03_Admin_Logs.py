@@ -1,3 +1,5 @@
+import time
+
 import streamlit as st
 import pandas as pd
 import api_client as api_service
@@ -12,6 +14,88 @@ api_base = (st.session_state.get("api_base") or "http://127.0.0.1:8000").rstrip(
 
 header.render_header("Access Logs", "Monitor system access history.")
 
+# --- INCREMENTAL FETCH ---
+# tables.render_logs_table에서 실제로 쓰는 컬럼만 유지
+LOG_COLUMNS = ["log_id", "event_time", "event_type", "employee_id", "name",
+               "camera_id", "camera_label", "recognized", "similarity"]
+
+# 로그 패널 자동 갱신 주기 (fragment만 다시 그림, 페이지 전체 rerun 없음)
+# 매 tick마다 since 커서 이후의 새 로그만 받아오므로 짧게 잡아도 부담이 적다
+LOGS_REFRESH_SEC = 3
+LOGS_STATE_KEY = "logs_buf"
+# 커서보다 이만큼 앞부터 다시 읽음: 같은 event_time의 row, 늦게 commit된 row도 잡도록 (log_id로 중복 제거)
+LOGS_OVERLAP_SEC = 10
+# overlap 밖에서 삭제/수정된 row는 증분 poll로는 반영되지 않으므로 이 주기로 전체 다시 로드
+LOGS_FULL_RELOAD_SEC = 60
+
+
+def _ts(value) -> pd.Timestamp:
+    # event_time(ISO 문자열) -> UTC Timestamp. 없으면 가장 과거로 (정렬 시 맨 뒤)
+    if not value:
+        return pd.Timestamp(0, tz="UTC")
+    t = pd.Timestamp(value)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+
+def _poll_logs(api_base: str, limit: int) -> list:
+    """
+    session_state에 쌓아둔 로그에 since 커서(- overlap) 이후 로그만 받아서 합친다.
+    LOGS_FULL_RELOAD_SEC마다 버퍼를 비우고 전체를 다시 받아 삭제/수정된 row도 맞춘다.
+    """
+    buf = st.session_state.get(LOGS_STATE_KEY)
+    now = time.time()
+    if (
+        buf is None
+        or buf.get("key") != (api_base, limit)
+        or now - buf.get("loaded_at", 0.0) >= LOGS_FULL_RELOAD_SEC
+    ):
+        # 서버/개수 변경 or 전체 재로드 주기 -> 처음부터 다시
+        buf = {"key": (api_base, limit), "rows": [], "cursor": None, "loaded_at": now}
+
+    since = None
+    if buf["cursor"] is not None:
+        since = (_ts(buf["cursor"]) - pd.Timedelta(seconds=LOGS_OVERLAP_SEC)).isoformat()
+
+    new = api_service.fetch_logs(limit=limit, api_base=api_base, since=since)
+    if new:
+        new_ids = {r.get("log_id") for r in new}
+        old = [r for r in buf["rows"] if r.get("log_id") not in new_ids]
+        # overlap 구간 row가 섞이므로 최신순으로 다시 정렬한 뒤 limit개만 유지
+        merged = sorted(new + old, key=lambda r: _ts(r.get("event_time")), reverse=True)
+        buf["rows"] = merged[:limit]
+        times = [_ts(r["event_time"]) for r in new if r.get("event_time")]
+        if times:
+            latest = max(times)
+            if buf["cursor"] is None or latest > _ts(buf["cursor"]):
+                buf["cursor"] = latest.isoformat()
+
+    st.session_state[LOGS_STATE_KEY] = buf
+    return buf["rows"]
+
+
+def _prepare_logs(logs: list, status_filter: str) -> list:
+    if not logs:
+        return []
+
+    df = pd.DataFrame(logs)
+
+    # Client-side filtering (Temporary client-side filter if API doesn't support filter yet)
+    if status_filter in ("Success", "Failed"):
+        if "recognized" in df.columns:
+            recognized = df["recognized"].fillna(False).astype(bool)
+        else:
+            recognized = pd.Series(False, index=df.index)
+        df = df[recognized] if status_filter == "Success" else df[~recognized]
+
+    # 최신순 정렬 (event_time 없는 row는 뒤로)
+    if "event_time" in df.columns:
+        df = df.sort_values("event_time", ascending=False, na_position="last", kind="stable")
+
+    df = df[[c for c in LOG_COLUMNS if c in df.columns]]
+
+    # NaN -> None (tables.render_logs_table는 dict.get() 기반)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
 # --- FILTER SECTION ---
 with st.container(border=True):
     c1, c2, c3 = st.columns(3)
@@ -23,20 +107,21 @@ with st.container(border=True):
         # If you want to filter by date, need to update API to accept date param
         date_filter = st.date_input("Date", value=None)
 
-# --- DATA FETCHING ---
-try:
-    logs = api_service.fetch_logs(limit=limit, api_base=api_base)
-    
-    # Client-side filtering (Temporary client-side filter if API doesn't support filter yet)
-    if status_filter == "Success":
-        logs = [l for l in logs if l.get("recognized")]
-    elif status_filter == "Failed":
-        logs = [l for l in logs if not l.get("recognized")]
-        
-except Exception as e:
-    st.error(f"Data loading error: {e}")
-    logs = []
-
-# --- DISPLAY TABLE ---
-# Reuse beautiful HTML table from ui/tables.py
-tables.render_logs_table(logs)
\ No newline at end of file
+    if st.button("Refresh"):
+        st.session_state.pop(LOGS_STATE_KEY, None)
+
+# --- DATA FETCHING + DISPLAY TABLE ---
+# fragment: 필터/헤더는 먼저 그려지고, 로그 테이블은 따로 증분 fetch + 주기적으로 갱신
+@st.fragment(run_every=LOGS_REFRESH_SEC)
+def _logs_panel(api_base: str, limit: int, status_filter: str) -> None:
+    try:
+        logs = _prepare_logs(_poll_logs(api_base, limit), status_filter)
+    except Exception as e:
+        st.error(f"Data loading error: {e}")
+        logs = []
+
+    # Reuse beautiful HTML table from ui/tables.py
+    tables.render_logs_table(logs)
+
+
+_logs_panel(api_base, limit, status_filter)
\ No newline at end of file
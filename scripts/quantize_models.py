@@ -0,0 +1,36 @@
+# scripts/quantize_models.py
+from __future__ import annotations
+
+import pathlib
+import sys
+
+# 서버 로더와 같은 경로(MODELS_DIR) / 같은 파일명(<name>.int8.onnx)을 쓰도록 face_models를 그대로 사용
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from api.models.face_models import ARCFACE_MODEL_PATH, quantized_path  # noqa: E402
+
+# 서버(api/models/face_models.py)는 FACE_QUANT=1 일 때 arcface.int8.onnx 를 사용한다.
+# - arcface: dynamic INT8 (가중치만, calibration 불필요)
+# - retinaface는 양자화하지 않음: static INT8은 detector 입력 전처리와 같은 분포로
+#   calibration 해야 하는데, 그 전처리는 _RETINA wrapper 안에 있어서 여기서 재현할 수 없음
+
+
+def main() -> int:
+    arc_path = pathlib.Path(ARCFACE_MODEL_PATH)
+    if not arc_path.exists():
+        print(f"[quant] missing: {arc_path} (download the models first)")
+        return 1
+
+    # 빌드 시점에 미리 만들어 두면 서버 첫 부팅에서 양자화 시간이 들지 않음
+    out_path = pathlib.Path(quantized_path(str(arc_path)))
+    if out_path == arc_path:
+        print("[quant] arcface quantization failed")
+        return 1
+
+    print(f"[quant] ok: {out_path} ({out_path.stat().st_size / (1024*1024):.2f} MB)")
+    print("[quant] done.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
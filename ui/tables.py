@@ -1,11 +1,8 @@
+import textwrap
+
 import streamlit as st
 
-def render_logs_table(logs: list):
-    """
-    Render bảng Logs với HTML tùy chỉnh.
-    """
-    # Header Control của bảng
-    st.markdown("""
+_LOGS_TABLE_HEAD = textwrap.dedent("""
     <div class="glass-card" style="padding: 0; overflow: hidden; border: 1px solid #e6f4f4; margin-top: 1rem;">
         <div style="padding: 1.5rem; border-bottom: 1px solid #e6f4f4; display: flex; justify-content: space-between; align-items: center;">
             <h3 style="font-weight: 700; font-size: 1.125rem; color: #1e293b; margin: 0;">Recent Activity</h3>
@@ -25,11 +22,19 @@ def render_logs_table(logs: list):
                     </tr>
                 </thead>
                 <tbody>
-    """, unsafe_allow_html=True)
+""").strip()
+
+
+def render_logs_table(logs: list):
+    """
+    Render bảng Logs với HTML tùy chỉnh.
+    Toàn bộ bảng được ghép thành 1 chuỗi HTML tĩnh và render bằng 1 lần st.markdown.
+    """
+    rows = []
 
     if not logs:
-        st.markdown('<tr><td colspan="5" style="text-align:center; padding:2rem; color:#94a3b8;">No records found</td></tr>', unsafe_allow_html=True)
-    
+        rows.append('<tr><td colspan="5" style="text-align:center; padding:2rem; color:#94a3b8;">No records found</td></tr>')
+
     for log in logs:
         # Data preparation
         name = log.get("name") or "Unknown"
@@ -46,28 +51,23 @@ def render_logs_table(logs: list):
         else:
             status_html = '<span style="background:rgba(254,242,242,1); color:#ef4444; padding:0.25rem 0.5rem; border-radius:0.5rem; font-size:0.65rem; font-weight:800; text-transform:uppercase;">Denied</span>'
 
-        st.markdown(f"""
-        <tr style="border-bottom: 1px solid #e6f4f4;">
-            <td>
-                <div style="display: flex; align-items: center; gap: 0.75rem;">
-                    <img src="{avatar}" style="width: 2.5rem; height: 2.5rem; border-radius: 99px; object-fit: cover;">
-                    <span style="font-weight: 700; font-size: 0.875rem;">{name}</span>
-                </div>
-            </td>
-            <td><span style="background:#f1f5f9; color:#64748b; padding:0.25rem 0.5rem; border-radius:0.5rem; font-size:0.75rem; font-weight:700;">Engineering</span></td>
-            <td style="font-weight: 600; font-size: 0.875rem; color: #475569;">{time_str}</td>
-            <td style="font-size: 0.875rem; font-weight: 700; color: #0f172a;">{cam}</td>
-            <td>{status_html}</td>
-        </tr>
-        """, unsafe_allow_html=True)
-
-    st.markdown("</tbody></table></div></div>", unsafe_allow_html=True)
+        # Không thụt dòng / không dòng trống: tránh markdown hiểu nhầm thành code block
+        rows.append(
+            '<tr style="border-bottom: 1px solid #e6f4f4;">'
+            '<td><div style="display: flex; align-items: center; gap: 0.75rem;">'
+            f'<img src="{avatar}" style="width: 2.5rem; height: 2.5rem; border-radius: 99px; object-fit: cover;">'
+            f'<span style="font-weight: 700; font-size: 0.875rem;">{name}</span>'
+            '</div></td>'
+            '<td><span style="background:#f1f5f9; color:#64748b; padding:0.25rem 0.5rem; border-radius:0.5rem; font-size:0.75rem; font-weight:700;">Engineering</span></td>'
+            f'<td style="font-weight: 600; font-size: 0.875rem; color: #475569;">{time_str}</td>'
+            f'<td style="font-size: 0.875rem; font-weight: 700; color: #0f172a;">{cam}</td>'
+            f'<td>{status_html}</td>'
+            '</tr>'
+        )
 
-def render_employee_table(employees: list):
-    """
-    Render bảng Employees giống Employees.tsx
-    """
-    st.markdown("""
+    st.markdown(_LOGS_TABLE_HEAD + "".join(rows) + "</tbody></table></div></div>", unsafe_allow_html=True)
+
+_EMPLOYEE_TABLE_HEAD = textwrap.dedent("""
     <div class="glass-card" style="padding: 0; overflow: hidden; border: 1px solid #e6f4f4; margin-top: 1rem;">
         <div style="overflow-x: auto;">
             <table class="custom-table">
@@ -80,10 +80,18 @@ def render_employee_table(employees: list):
                     </tr>
                 </thead>
                 <tbody>
-    """, unsafe_allow_html=True)
+""").strip()
+
+
+def render_employee_table(employees: list):
+    """
+    Render bảng Employees giống Employees.tsx
+    Ghép toàn bộ thành 1 chuỗi HTML và render bằng 1 lần st.markdown (giống render_logs_table).
+    """
+    rows = []
 
     if not employees:
-         st.markdown('<tr><td colspan="4" style="text-align:center; padding:2rem; color:#94a3b8;">No employees found</td></tr>', unsafe_allow_html=True)
+        rows.append('<tr><td colspan="4" style="text-align:center; padding:2rem; color:#94a3b8;">No employees found</td></tr>')
 
     for emp in employees:
         name = emp.get("name")
@@ -97,21 +105,20 @@ def render_employee_table(employees: list):
         else:
             badge = '<span style="background:rgba(241,245,249,1); color:#94a3b8; padding:0.25rem 0.5rem; border-radius:0.5rem; font-size:0.65rem; font-weight:800; text-transform:uppercase;">No Data</span>'
 
-        st.markdown(f"""
-        <tr>
-            <td>
-                <div style="display: flex; align-items: center; gap: 0.75rem;">
-                    <img src="{avatar}" style="width: 2.5rem; height: 2.5rem; border-radius: 0.75rem; object-fit: cover;">
-                    <div>
-                        <div style="font-weight: 800; font-size: 0.875rem;">{name}</div>
-                        <div style="font-size: 0.75rem; color: #94a3b8;">user@company.com</div>
-                    </div>
-                </div>
-            </td>
-            <td style="font-weight: 600; font-size: 0.875rem; color: #475569;">{code}</td>
-            <td>{badge}</td>
-            <td style="text-align: right; color: #cbd5e1;">● ● ●</td>
-        </tr>
-        """, unsafe_allow_html=True)
-
-    st.markdown("</tbody></table></div></div>", unsafe_allow_html=True)
\ No newline at end of file
+        # Không thụt dòng / không dòng trống: tránh markdown hiểu nhầm thành code block
+        rows.append(
+            '<tr>'
+            '<td><div style="display: flex; align-items: center; gap: 0.75rem;">'
+            f'<img src="{avatar}" style="width: 2.5rem; height: 2.5rem; border-radius: 0.75rem; object-fit: cover;">'
+            '<div>'
+            f'<div style="font-weight: 800; font-size: 0.875rem;">{name}</div>'
+            '<div style="font-size: 0.75rem; color: #94a3b8;">user@company.com</div>'
+            '</div>'
+            '</div></td>'
+            f'<td style="font-weight: 600; font-size: 0.875rem; color: #475569;">{code}</td>'
+            f'<td>{badge}</td>'
+            '<td style="text-align: right; color: #cbd5e1;">● ● ●</td>'
+            '</tr>'
+        )
+
+    st.markdown(_EMPLOYEE_TABLE_HEAD + "".join(rows) + "</tbody></table></div></div>", unsafe_allow_html=True)
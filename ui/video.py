@@ -0,0 +1,47 @@
+import threading
+
+import numpy as np
+from streamlit_webrtc import VideoProcessorBase
+
+
+class VideoProcessor(VideoProcessorBase):
+    """
+    Streamlit 페이지 스크립트는 rerun마다 다시 실행되지만 import된 모듈은 프로세스당 1번만
+    로드되므로, 여기서 정의한 class는 rerun/세션과 상관없이 같은 객체로 유지됨
+    (webrtc_streamer의 factory identity가 바뀌지 않음).
+    """
+
+    # 페이지 설정값(.env)으로 덮어씀 - 클래스 속성이라 모든 세션이 같은 값을 사용
+    frame_diff_threshold: float = 4.0
+    max_encode_width: int = 640
+
+    def __init__(self):
+        self.latest_bgr = None
+        self.new_frame = threading.Event()  # 장면이 바뀔 때만 set -> 같은 장면은 다시 스캔하지 않음
+        self._prev_small = None
+        self.scan = None  # ScanWorker: 이 스트림(세션) 전용, 첫 스캔 때 생성
+
+    def on_ended(self):
+        # 스트림 종료 -> 이 세션의 스캔 스레드 정리
+        if self.scan is not None:
+            self.scan.stop()
+
+    def recv(self, frame):
+        # 32x32 grayscale MAD로 장면 변화 감지 (변화 없으면 latest_bgr 유지)
+        # - 썸네일은 PyAV(libswscale)에서 바로 만들어 full-res BGR 배열을 할당하지 않음
+        small = frame.reformat(width=32, height=32, format="gray").to_ndarray().astype(np.int16)
+        if self._prev_small is not None and np.mean(np.abs(small - self._prev_small)) < self.frame_diff_threshold:
+            return frame
+
+        # 장면이 바뀐 경우에만 BGR 변환. 매번 새 배열을 publish하므로
+        # 스캔 워커가 들고 있는 이전 프레임이 덮어써지지 않음.
+        # 축소(max_encode_width)도 같은 libswscale pass에서 처리.
+        w, h = frame.width, frame.height
+        max_w = self.max_encode_width
+        if w > max_w:
+            w, h = max_w, int(h * max_w / float(w))
+
+        self._prev_small = small
+        self.latest_bgr = frame.reformat(width=w, height=h, format="bgr24").to_ndarray()
+        self.new_frame.set()
+        return frame